@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.database import connect_db, close_db
+from app.middleware.rate_limit import RateLimitMiddleware, stats as rate_limit_stats
 from app.routes import employee_routes, attendance_routes
 
 # Initialize FastAPI app
@@ -11,6 +12,10 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Per-client rate limiting and admission control for expensive routes.
+# Added before CORS so shed responses still carry CORS headers.
+app.add_middleware(RateLimitMiddleware)
+
 # Add CORS middleware to allow requests from frontend
 app.add_middleware(
     CORSMiddleware,
@@ -21,6 +26,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Archive-Horizon"],
 )
 
 
@@ -56,6 +62,12 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", tags=["health"])
+async def metrics():
+    """Rate limiter shed counters and queue depths"""
+    return {"rate_limit": rate_limit_stats.snapshot()}
+
+
 # Include routes
 app.include_router(employee_routes.router)
 app.include_router(attendance_routes.router)
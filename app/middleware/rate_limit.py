@@ -0,0 +1,244 @@
+import asyncio
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+
+
+# Default token bucket for every (client, route) pair
+RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", "10"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "20"))
+
+# Tighter bucket + admission control for routes that run full-collection aggregations
+EXPENSIVE_RATE_LIMIT_RPS = float(os.getenv("EXPENSIVE_RATE_LIMIT_RPS", "2"))
+EXPENSIVE_RATE_LIMIT_BURST = int(os.getenv("EXPENSIVE_RATE_LIMIT_BURST", "5"))
+EXPENSIVE_MAX_IN_FLIGHT = int(os.getenv("EXPENSIVE_MAX_IN_FLIGHT", "4"))
+EXPENSIVE_MAX_QUEUE = int(os.getenv("EXPENSIVE_MAX_QUEUE", "8"))
+EXPENSIVE_QUEUE_TIMEOUT = float(os.getenv("EXPENSIVE_QUEUE_TIMEOUT", "2"))
+
+# Number of trusted reverse proxies in front of the app (e.g. 1 on Vercel).
+# 0 ignores X-Forwarded-For entirely, since clients can set it to anything.
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+# Upper bound on tracked buckets so a flood of distinct clients cannot grow memory
+MAX_TRACKED_BUCKETS = int(os.getenv("RATE_LIMIT_MAX_BUCKETS", "10000"))
+
+# Routes keyed by "METHOD path_format" that go through the concurrency limiter
+EXPENSIVE_ROUTES = {
+    "GET /attendance/",
+    "GET /attendance/export",
+    "GET /attendance/{employee_id}",
+}
+
+# Routes that are never limited (health probes, metrics scraping)
+EXEMPT_PATHS = {"/", "/health", "/metrics"}
+
+
+@dataclass
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second"""
+    rate: float
+    capacity: int
+    tokens: float = 0.0
+    updated_at: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self):
+        self.tokens = float(self.capacity)
+
+    def consume(self) -> float:
+        """Take one token. Returns 0 on success, else seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class ConcurrencyLimiter:
+    """Caps in-flight requests for a route with a bounded wait queue"""
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.queued = 0
+
+    async def acquire(self) -> bool:
+        """Acquire a slot, waiting in the queue if needed. Returns False if shed."""
+        if not self.semaphore.locked():
+            await self.semaphore.acquire()
+            self.in_flight += 1
+            return True
+
+        if self.queued >= self.max_queue:
+            return False
+
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        return True
+
+    def release(self) -> None:
+        """Release a slot taken by acquire()"""
+        self.in_flight -= 1
+        self.semaphore.release()
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying per-client, per-route token buckets and
+    admission control on expensive routes. Over-limit requests are shed
+    with 429 (rate limited) or 503 (route saturated) and a Retry-After header.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+        self.buckets: dict[tuple[str, str], TokenBucket] = {}
+        self.limiters = {
+            route: ConcurrencyLimiter(
+                EXPENSIVE_MAX_IN_FLIGHT, EXPENSIVE_MAX_QUEUE, EXPENSIVE_QUEUE_TIMEOUT
+            )
+            for route in EXPENSIVE_ROUTES
+        }
+        self.shed_rate_limited: dict[str, int] = {}
+        self.shed_overloaded: dict[str, int] = {}
+        stats.middleware = self
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        route_key = self._route_key(scope)
+        expensive = route_key in self.limiters
+
+        retry_after = self._bucket(_client_id(scope), route_key, expensive).consume()
+        if retry_after:
+            self.shed_rate_limited[route_key] = self.shed_rate_limited.get(route_key, 0) + 1
+            response = _shed_response(429, "Too many requests", retry_after)
+            await response(scope, receive, send)
+            return
+
+        if not expensive:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters[route_key]
+        if not await limiter.acquire():
+            self.shed_overloaded[route_key] = self.shed_overloaded.get(route_key, 0) + 1
+            response = _shed_response(503, "Server busy, try again later", limiter.queue_timeout)
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    def _route_key(self, scope: dict) -> str:
+        """
+        Resolve the request to its route template so path params share a bucket.
+        Unmatched paths share one key so scanners cannot mint buckets per URL.
+        """
+        path = "<unmatched>"
+        router = scope["app"].router if "app" in scope else None
+        if router is not None:
+            for route in router.routes:
+                match, _ = route.matches(scope)
+                if match == Match.FULL:
+                    path = getattr(route, "path_format", path)
+                    break
+        return f"{scope['method']} {path}"
+
+    def _bucket(self, client: str, route_key: str, expensive: bool) -> TokenBucket:
+        """Get or create the token bucket for a (client, route) pair"""
+        key = (client, route_key)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= MAX_TRACKED_BUCKETS:
+                self._prune_buckets()
+            if expensive:
+                bucket = TokenBucket(EXPENSIVE_RATE_LIMIT_RPS, EXPENSIVE_RATE_LIMIT_BURST)
+            else:
+                bucket = TokenBucket(RATE_LIMIT_RPS, RATE_LIMIT_BURST)
+            self.buckets[key] = bucket
+        return bucket
+
+    def _prune_buckets(self) -> None:
+        """Drop buckets that have refilled completely (idle clients)"""
+        now = time.monotonic()
+        idle = [
+            key for key, bucket in self.buckets.items()
+            if bucket.tokens + (now - bucket.updated_at) * bucket.rate >= bucket.capacity
+        ]
+        for key in idle:
+            del self.buckets[key]
+
+        # Still full: evict the least recently used half
+        if len(self.buckets) >= MAX_TRACKED_BUCKETS:
+            oldest = sorted(self.buckets, key=lambda k: self.buckets[k].updated_at)
+            for key in oldest[: len(oldest) // 2]:
+                del self.buckets[key]
+
+
+class RateLimitStats:
+    """Snapshot of shed counters and queue depths for the metrics endpoint"""
+    middleware: Optional[RateLimitMiddleware] = None
+
+    def snapshot(self) -> dict:
+        mw = self.middleware
+        if mw is None:
+            return {}
+        return {
+            "shed_rate_limited": dict(mw.shed_rate_limited),
+            "shed_overloaded": dict(mw.shed_overloaded),
+            "routes": {
+                route: {
+                    "in_flight": limiter.in_flight,
+                    "queue_depth": limiter.queued,
+                }
+                for route, limiter in mw.limiters.items()
+            },
+            "tracked_buckets": len(mw.buckets),
+        }
+
+
+stats = RateLimitStats()
+
+
+def _client_id(scope: dict) -> str:
+    """
+    Identify the client. X-Forwarded-For is only read when TRUSTED_PROXY_HOPS
+    is set, and then only the hop appended by the outermost trusted proxy.
+    """
+    if TRUSTED_PROXY_HOPS > 0:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                hops = [hop.strip() for hop in value.decode("latin-1").split(",")]
+                if len(hops) >= TRUSTED_PROXY_HOPS:
+                    return hops[-TRUSTED_PROXY_HOPS]
+                break
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _shed_response(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    """Build a shed response in the API's standard error format"""
+    return JSONResponse(
+        status_code=status_code,
+        content={"detail": detail},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
@@ -1,10 +1,26 @@
-from fastapi import APIRouter, status
+from typing import Optional
+from fastapi import APIRouter, Query, Response, status
+from fastapi.responses import StreamingResponse
 from app.schemas.attendance_schema import AttendanceCreate, AttendanceResponse
+from app.services.archive_service import ArchiveService
 from app.services.attendance_service import AttendanceService
 
 router = APIRouter(prefix="/attendance", tags=["attendance"])
 
 
+async def _mark_archive_horizon(
+    response: Response,
+    start_date: Optional[str],
+    end_date: Optional[str]
+) -> None:
+    """Unbounded listings skip the archive; tell the client where it begins"""
+    if start_date or end_date:
+        return
+    horizon = await ArchiveService.horizon()
+    if horizon:
+        response.headers["X-Archive-Horizon"] = horizon
+
+
 @router.post(
     "/",
     response_model=AttendanceResponse,
@@ -25,24 +41,62 @@ async def mark_attendance(attendance_data: AttendanceCreate):
     "/",
     summary="Get all attendance records"
 )
-async def get_all_attendance():
+async def get_all_attendance(
+    response: Response,
+    start_date: Optional[str] = Query(None, description="YYYY-MM-DD, inclusive"),
+    end_date: Optional[str] = Query(None, description="YYYY-MM-DD, inclusive")
+):
     """
-    Retrieve all attendance records.
+    Retrieve all attendance records, optionally within a date range.
     Returns records sorted by date in descending order.
     Includes employee names joined from employee collection.
+    Archived records are included whenever start_date or end_date is given.
+    Without a range only live records are returned, and the X-Archive-Horizon
+    header gives the newest archived date.
     """
-    records = await AttendanceService.get_all_attendance()
+    records = await AttendanceService.get_all_attendance(start_date, end_date)
+    await _mark_archive_horizon(response, start_date, end_date)
     return {"records": records, "total": len(records)}
 
 
+@router.get(
+    "/export",
+    summary="Export attendance records as NDJSON"
+)
+async def export_attendance(
+    start_date: Optional[str] = Query(None, description="YYYY-MM-DD, inclusive"),
+    end_date: Optional[str] = Query(None, description="YYYY-MM-DD, inclusive")
+):
+    """
+    Stream attendance records (hot and archived) as newline-delimited JSON.
+    Without a range the whole archive is included.
+    Example: /attendance/export?start_date=2024-01-01&end_date=2024-12-31
+    """
+    # Validate up front so a bad range returns 400 instead of a broken stream
+    AttendanceService.build_date_filter(start_date, end_date)
+    return StreamingResponse(
+        AttendanceService.export_attendance(start_date, end_date),
+        media_type="application/x-ndjson"
+    )
+
+
 @router.get(
     "/{employee_id}",
     response_model=list[AttendanceResponse],
     summary="Get attendance records for an employee"
 )
-async def get_employee_attendance(employee_id: str):
+async def get_employee_attendance(
+    response: Response,
+    employee_id: str,
+    start_date: Optional[str] = Query(None, description="YYYY-MM-DD, inclusive"),
+    end_date: Optional[str] = Query(None, description="YYYY-MM-DD, inclusive")
+):
     """
-    Get all attendance records for a specific employee.
-    Example: /attendance/EMP001
+    Get all attendance records for a specific employee, optionally within a date range.
+    Archived records are included whenever start_date or end_date is given;
+    otherwise see the X-Archive-Horizon header.
+    Example: /attendance/EMP001?end_date=2024-12-31
     """
-    return await AttendanceService.get_attendance_by_employee(employee_id)
+    records = await AttendanceService.get_attendance_by_employee(employee_id, start_date, end_date)
+    await _mark_archive_horizon(response, start_date, end_date)
+    return records
@@ -0,0 +1,395 @@
+import asyncio
+import gzip
+import json
+import mmap
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, Optional
+from pymongo import DeleteOne
+from app.database import get_db
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# Directory holding the compressed attendance partitions (must be writable)
+ARCHIVE_DIR = Path(os.getenv("ATTENDANCE_ARCHIVE_DIR", "archive/attendance"))
+# Attendance older than this many days is moved out of Mongo
+ARCHIVE_AFTER_DAYS = int(os.getenv("ATTENDANCE_ARCHIVE_AFTER_DAYS", "365"))
+
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".lock"
+
+# Parsed manifest cached on its file identity, so request paths only pay for a stat()
+_manifest_cache: tuple[tuple, dict] = ((), {})
+
+
+def archive_cutoff_date() -> str:
+    """Oldest date (YYYY-MM-DD) that stays in the hot collection"""
+    return (datetime.utcnow().date() - timedelta(days=ARCHIVE_AFTER_DAYS)).isoformat()
+
+
+def _partition_path(month: str, employee_id: str) -> Path:
+    """Partition file for one employee's month, e.g. 2024/2024-03/EMP001.ndjson.gz"""
+    return ARCHIVE_DIR / month[:4] / month / f"{employee_id}.ndjson.gz"
+
+
+@contextmanager
+def _archive_lock() -> Iterator[None]:
+    """
+    Exclusive cross-process lock around partition and manifest rewrites,
+    shared by the archive job and employee purges in the API process.
+    """
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(ARCHIVE_DIR / LOCK_FILE, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _read_manifest_file() -> dict:
+    """
+    Load the manifest from disk:
+    {"newest_date": "YYYY-MM-DD", "partitions": {"YYYY-MM": {employee_id: count}}}
+    """
+    path = ARCHIVE_DIR / MANIFEST_FILE
+    if not path.exists():
+        return {"newest_date": None, "partitions": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _manifest() -> dict:
+    """Read-only manifest for request paths, reparsed only when the file changes"""
+    global _manifest_cache
+    try:
+        st = (ARCHIVE_DIR / MANIFEST_FILE).stat()
+    except FileNotFoundError:
+        return {"newest_date": None, "partitions": {}}
+    key = (st.st_mtime_ns, st.st_ino, st.st_size)
+    if _manifest_cache[0] != key:
+        _manifest_cache = (key, _read_manifest_file())
+    return _manifest_cache[1]
+
+
+def _save_manifest(manifest: dict) -> None:
+    global _manifest_cache
+    path = ARCHIVE_DIR / MANIFEST_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, sort_keys=True)
+    os.replace(tmp, path)
+    # Our own writes must be visible immediately, even within one mtime tick
+    _manifest_cache = ((), {})
+
+
+def _read_partition(path: Path) -> Iterator[dict]:
+    """Stream records from a partition through a memory-mapped gzip reader"""
+    if not path.exists() or path.stat().st_size == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with gzip.GzipFile(fileobj=mm, mode="rb") as gz:
+            for line in gz:
+                record = json.loads(line)
+                if record.get("created_at"):
+                    record["created_at"] = datetime.fromisoformat(record["created_at"])
+                yield record
+
+
+def _read_range(path: Path, start_date: Optional[str], end_date: Optional[str]) -> list[dict]:
+    """Read one partition fully, keeping records within the date range"""
+    return [
+        record for record in _read_partition(path)
+        if (not start_date or record["date"] >= start_date)
+        and (not end_date or record["date"] <= end_date)
+    ]
+
+
+def _replace_partition(path: Path, records: list[dict]) -> None:
+    """Write records to a temp file and atomically swap it in"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as gz:
+        for record in records:
+            gz.write(json.dumps(_serialize(record)) + "\n")
+    os.replace(tmp, path)
+
+
+def _serialize(record: dict) -> dict:
+    """Archive row format: Mongo _id is dropped, created_at stored as ISO string"""
+    created_at = record.get("created_at")
+    return {
+        "employee_id": record["employee_id"],
+        "date": record["date"],
+        "status": record["status"],
+        "created_at": created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+    }
+
+
+def _write_month(month: str, records: list[dict]) -> None:
+    """
+    Merge a month of records into its per-employee partitions.
+    Rows are keyed on date so re-running the job after a partial failure
+    never duplicates them; newer values win.
+    """
+    by_employee: dict[str, list[dict]] = {}
+    for record in records:
+        by_employee.setdefault(record["employee_id"], []).append(record)
+
+    with _archive_lock():
+        manifest = _read_manifest_file()
+        counts = manifest["partitions"].setdefault(month, {})
+        for employee_id, rows in by_employee.items():
+            path = _partition_path(month, employee_id)
+            merged = {r["date"]: r for r in _read_partition(path)}
+            merged.update((r["date"], r) for r in rows)
+            _replace_partition(path, [merged[d] for d in sorted(merged, reverse=True)])
+            counts[employee_id] = len(merged)
+
+        newest = max(record["date"] for record in records)
+        if not manifest["newest_date"] or newest > manifest["newest_date"]:
+            manifest["newest_date"] = newest
+        _save_manifest(manifest)
+
+
+def _listed(month: str, employee_id: str) -> bool:
+    """Whether the (cached) manifest has a partition for this employee's month"""
+    return employee_id in _manifest()["partitions"].get(month, {})
+
+
+def _drop_employee(employee_id: str) -> int:
+    """Delete every partition belonging to the given employee"""
+    months = _manifest()["partitions"]
+    if not any(employee_id in counts for counts in months.values()):
+        return 0
+
+    removed = 0
+    with _archive_lock():
+        manifest = _read_manifest_file()
+        for month, counts in list(manifest["partitions"].items()):
+            if employee_id not in counts:
+                continue
+            removed += counts.pop(employee_id)
+            _partition_path(month, employee_id).unlink(missing_ok=True)
+            if not counts:
+                del manifest["partitions"][month]
+        if removed:
+            _save_manifest(manifest)
+    return removed
+
+
+def _discard_rows(keys: list[tuple[str, str]]) -> int:
+    """
+    Remove archived rows for (employee_id, date) keys that now live in the
+    hot collection, so they are not counted or returned twice.
+    """
+    wanted: dict[tuple[str, str], set[str]] = {}
+    for employee_id, date in keys:
+        if _listed(date[:7], employee_id):
+            wanted.setdefault((date[:7], employee_id), set()).add(date)
+    if not wanted:
+        return 0
+
+    removed = 0
+    with _archive_lock():
+        manifest = _read_manifest_file()
+        for (month, employee_id), dates in wanted.items():
+            counts = manifest["partitions"].get(month, {})
+            if employee_id not in counts:
+                continue
+            path = _partition_path(month, employee_id)
+            rows = list(_read_partition(path))
+            kept = [r for r in rows if r["date"] not in dates]
+            if len(kept) == len(rows):
+                continue
+            removed += len(rows) - len(kept)
+            if kept:
+                _replace_partition(path, kept)
+                counts[employee_id] = len(kept)
+            else:
+                path.unlink(missing_ok=True)
+                del counts[employee_id]
+                if not counts:
+                    del manifest["partitions"][month]
+        if removed:
+            _save_manifest(manifest)
+    return removed
+
+
+def archive_months(
+    employee_id: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> list[list[Path]]:
+    """
+    Partition files overlapping the range, grouped by month, newest month
+    first. Either bound may be omitted; a range starting after the newest
+    archived date never touches the archive.
+    """
+    manifest = _manifest()
+    newest = manifest["newest_date"]
+    if not newest or (start_date and start_date > newest):
+        return []
+
+    months = []
+    for month in sorted(manifest["partitions"], reverse=True):
+        if (start_date and month < start_date[:7]) or (end_date and month > end_date[:7]):
+            continue
+        counts = manifest["partitions"][month]
+        if employee_id:
+            paths = [_partition_path(month, employee_id)] if employee_id in counts else []
+        else:
+            paths = [_partition_path(month, emp) for emp in sorted(counts)]
+        if paths:
+            months.append(paths)
+    return months
+
+
+def _read_month(paths: list[Path], start_date: Optional[str], end_date: Optional[str]) -> list[dict]:
+    """Read all of a month's partitions, keeping records within the date range"""
+    records = []
+    for path in paths:
+        records.extend(_read_range(path, start_date, end_date))
+    return records
+
+
+class ArchiveService:
+    """Service for the compressed attendance archive"""
+
+    @staticmethod
+    async def archive_attendance(before_date: Optional[str] = None) -> dict:
+        """
+        Move attendance older than `before_date` (default: the configured
+        horizon) into monthly partitions, then delete it from Mongo.
+        Each month is written to disk before its records are deleted, and
+        a record is only deleted if it still matches the archived copy.
+        """
+        db = get_db()
+        cutoff = before_date or archive_cutoff_date()
+
+        cursor = db["attendance"].find({"date": {"$lt": cutoff}}).sort("date", 1)
+
+        archived = 0
+        changed = []
+        partitions = []
+        month, batch = None, []
+
+        async def flush() -> int:
+            await asyncio.to_thread(_write_month, month, batch)
+            result = await db["attendance"].bulk_write(
+                [DeleteOne({"_id": r["_id"], "status": r["status"]}) for r in batch],
+                ordered=False
+            )
+            if result.deleted_count < len(batch):
+                # Updated after being read: the hot copy is kept and wins on reads
+                # and is dropped from the archive so it is not counted twice
+                remaining = await db["attendance"].find(
+                    {"_id": {"$in": [r["_id"] for r in batch]}},
+                    {"_id": 0, "employee_id": 1, "date": 1}
+                ).to_list(None)
+                keys = [(r["employee_id"], r["date"]) for r in remaining]
+                await asyncio.to_thread(_discard_rows, keys)
+                changed.extend(f"{employee_id} {date}" for employee_id, date in keys)
+            partitions.append(month)
+            return result.deleted_count
+
+        async for record in cursor:
+            record_month = record["date"][:7]
+            if month is not None and record_month != month:
+                archived += await flush()
+                batch = []
+            month = record_month
+            batch.append(record)
+
+        if batch:
+            archived += await flush()
+
+        return {
+            "cutoff": cutoff,
+            "archived": archived,
+            "partitions": partitions,
+            "changed_during_archive": changed,
+        }
+
+    @staticmethod
+    async def horizon() -> Optional[str]:
+        """Newest archived date, or None if nothing has been archived"""
+        manifest = await asyncio.to_thread(_manifest)
+        return manifest["newest_date"]
+
+    @staticmethod
+    async def months(
+        employee_id: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> list[list[Path]]:
+        """Plan which partitions a range needs, off the event loop"""
+        return await asyncio.to_thread(archive_months, employee_id, start_date, end_date)
+
+    @staticmethod
+    async def read_month(
+        paths: list[Path],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> list[dict]:
+        """Read one month's partitions in a single threadpool call"""
+        return await asyncio.to_thread(_read_month, paths, start_date, end_date)
+
+    @staticmethod
+    async def get_archived(
+        employee_id: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> list[dict]:
+        """Read archived records in the range, one threadpool call per month"""
+        records = []
+        for paths in await ArchiveService.months(employee_id, start_date, end_date):
+            records.extend(await ArchiveService.read_month(paths, start_date, end_date))
+        return records
+
+    @staticmethod
+    async def count_archived() -> int:
+        """Total archived records, from the manifest"""
+        manifest = await asyncio.to_thread(_manifest)
+        return sum(sum(counts.values()) for counts in manifest["partitions"].values())
+
+    @staticmethod
+    async def discard(employee_id: str, date: str) -> int:
+        """
+        Drop an archived row that has been re-created in the hot collection.
+        Archive I/O errors are logged, not raised: the hot copy already wins on reads.
+        """
+        try:
+            return await asyncio.to_thread(_discard_rows, [(employee_id, date)])
+        except OSError as exc:
+            print(f"✗ Could not discard archived attendance {employee_id} {date}: {exc}")
+            return 0
+
+    @staticmethod
+    async def delete_employee_records(employee_id: str) -> int:
+        """
+        Purge an employee's records from the archive. Archive I/O errors are
+        logged, not raised, so they never fail an employee delete that
+        already succeeded in Mongo.
+        """
+        try:
+            return await asyncio.to_thread(_drop_employee, employee_id)
+        except OSError as exc:
+            print(f"✗ Could not purge archived attendance for {employee_id}: {exc}")
+            return 0
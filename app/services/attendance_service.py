@@ -1,6 +1,9 @@
+import json
 from datetime import datetime
+from typing import AsyncIterator, Optional
 from fastapi import HTTPException, status
 from app.database import get_db
+from app.services.archive_service import ArchiveService
 from app.schemas.attendance_schema import AttendanceCreate, AttendanceResponse
 from app.utils.validators import (
     validate_date_format,
@@ -59,6 +62,8 @@ class AttendanceService:
                 "created_at": datetime.utcnow()
             }
             await db["attendance"].insert_one(attendance_doc)
+            # Re-marking an archived day: the hot record replaces the archived one
+            await ArchiveService.discard(attendance_data.employee_id, attendance_data.date)
         
         return AttendanceResponse(
             employee_id=attendance_data.employee_id,
@@ -68,12 +73,21 @@ class AttendanceService:
         )
 
     @staticmethod
-    async def get_all_attendance() -> list[dict]:
-        """Get all attendance records with employee details"""
+    async def get_all_attendance(
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> list[dict]:
+        """
+        Get attendance records with employee details. Archived records are
+        merged in for any bounded range overlapping the archive; an unbounded
+        listing reads the hot collection only.
+        """
         db = get_db()
+        date_filter = AttendanceService.build_date_filter(start_date, end_date)
         
         # Pipeline to join with employees collection
         pipeline = [
+            {"$match": date_filter},
             {
                 "$lookup": {
                     "from": "employees",
@@ -99,12 +113,33 @@ class AttendanceService:
                 "created_at": record.get("created_at")
             })
         
+        # Merge in archived records; hot records win for the same employee/date
+        archived = []
+        if start_date or end_date:
+            archived = await ArchiveService.get_archived(start_date=start_date, end_date=end_date)
+        if archived:
+            hot_keys = {(r["employee_id"], r["date"]) for r in result}
+            archived = [r for r in archived if (r["employee_id"], r["date"]) not in hot_keys]
+            names = await AttendanceService._employee_names({r["employee_id"] for r in archived})
+            for record in archived:
+                record["employee_name"] = names.get(record["employee_id"], "Unknown")
+            result = AttendanceService._newest_first(result + archived)
+        
         return result
 
     @staticmethod
-    async def get_attendance_by_employee(employee_id: str) -> list[AttendanceResponse]:
-        """Get attendance records for a specific employee"""
+    async def get_attendance_by_employee(
+        employee_id: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> list[AttendanceResponse]:
+        """
+        Get attendance records for a specific employee. Archived records are
+        merged in for any bounded range overlapping the archive; an unbounded
+        listing reads the hot collection only.
+        """
         db = get_db()
+        date_filter = AttendanceService.build_date_filter(start_date, end_date)
         
         # Check if employee exists
         employee = await db["employees"].find_one({"employee_id": employee_id})
@@ -115,9 +150,18 @@ class AttendanceService:
             )
         
         records = await db["attendance"].find(
-            {"employee_id": employee_id}
+            {"employee_id": employee_id, **date_filter}
         ).sort("date", -1).to_list(None)
         
+        archived = []
+        if start_date or end_date:
+            archived = await ArchiveService.get_archived(employee_id, start_date, end_date)
+        if archived:
+            hot_dates = {record["date"] for record in records}
+            records = AttendanceService._newest_first(
+                records + [r for r in archived if r["date"] not in hot_dates]
+            )
+        
         return [
             AttendanceResponse(
                 employee_id=record["employee_id"],
@@ -140,6 +184,82 @@ class AttendanceService:
 
     @staticmethod
     async def get_total_attendance() -> int:
-        """Get total attendance records"""
+        """
+        Get total attendance records (hot collection + archive). Rows moved
+        back into the hot collection are discarded from the archive, so none
+        are counted twice.
+        """
+        db = get_db()
+        hot = await db["attendance"].estimated_document_count()
+        return hot + await ArchiveService.count_archived()
+
+    @staticmethod
+    async def export_attendance(
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream attendance as NDJSON lines: hot records first, then every
+        archived month in range (all of it when unbounded), one threadpool
+        call per month.
+        """
+        db = get_db()
+        date_filter = AttendanceService.build_date_filter(start_date, end_date)
+        
+        hot_keys = set()
+        cursor = db["attendance"].find(date_filter, {"_id": 0}).sort("date", -1)
+        async for record in cursor:
+            hot_keys.add((record["employee_id"], record["date"]))
+            yield AttendanceService._to_ndjson(record)
+        
+        for paths in await ArchiveService.months(start_date=start_date, end_date=end_date):
+            for record in await ArchiveService.read_month(paths, start_date, end_date):
+                if (record["employee_id"], record["date"]) not in hot_keys:
+                    yield AttendanceService._to_ndjson(record)
+
+    @staticmethod
+    def build_date_filter(start_date: Optional[str], end_date: Optional[str]) -> dict:
+        """Build a Mongo date range filter, validating both bounds"""
+        date_range = {}
+        for op, value in (("$gte", start_date), ("$lte", end_date)):
+            if value is None:
+                continue
+            if not validate_date_format(value):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid date format. Use YYYY-MM-DD"
+                )
+            date_range[op] = value
+        return {"date": date_range} if date_range else {}
+
+    @staticmethod
+    async def _employee_names(employee_ids: set[str]) -> dict[str, str]:
+        """Map employee_id -> full_name for the given ids"""
+        if not employee_ids:
+            return {}
         db = get_db()
-        return await db["attendance"].count_documents({})
+        employees = await db["employees"].find(
+            {"employee_id": {"$in": list(employee_ids)}},
+            {"employee_id": 1, "full_name": 1}
+        ).to_list(None)
+        return {emp["employee_id"]: emp["full_name"] for emp in employees}
+
+    @staticmethod
+    def _newest_first(records: list[dict]) -> list[dict]:
+        """Sort by date then created_at, newest first"""
+        return sorted(
+            records,
+            key=lambda r: (r["date"], r.get("created_at") or datetime.min),
+            reverse=True
+        )
+
+    @staticmethod
+    def _to_ndjson(record: dict) -> str:
+        """Serialize a record as one NDJSON line"""
+        created_at = record.get("created_at")
+        return json.dumps({
+            "employee_id": record["employee_id"],
+            "date": record["date"],
+            "status": record["status"],
+            "created_at": created_at.isoformat() if isinstance(created_at, datetime) else created_at
+        }) + "\n"
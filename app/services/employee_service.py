@@ -1,6 +1,7 @@
 from datetime import datetime
 from fastapi import HTTPException, status
 from app.database import get_db
+from app.services.archive_service import ArchiveService
 from app.schemas.employee_schema import EmployeeCreate, EmployeeResponse
 from app.utils.validators import validate_email, generate_employee_id
 
@@ -106,6 +107,7 @@ class EmployeeService:
         
         # Delete related attendance records
         await db["attendance"].delete_many({"employee_id": employee_id})
+        await ArchiveService.delete_employee_records(employee_id)
         
         return {"message": f"Employee {employee_id} deleted successfully"}
 
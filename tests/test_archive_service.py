@@ -0,0 +1,164 @@
+import asyncio
+import json
+from datetime import datetime
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+import app.database as database
+import app.services.archive_service as archive_service
+from app.schemas.attendance_schema import AttendanceCreate
+from app.services.archive_service import ArchiveService
+from app.services.attendance_service import AttendanceService
+from app.services.employee_service import EmployeeService
+
+
+OLD_DATES = ["2020-01-06", "2020-01-13", "2020-02-03"]
+HOT_DATE = "2026-10-01"
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive_service, "ARCHIVE_DIR", tmp_path / "archive")
+    monkeypatch.setattr(archive_service, "_manifest_cache", ((), {}))
+    return tmp_path / "archive"
+
+
+@pytest.fixture
+def db(monkeypatch, archive_dir):
+    mock_db = AsyncMongoMockClient()["hrms_test"]
+    monkeypatch.setattr(database, "db", mock_db)
+
+    async def seed():
+        await mock_db["employees"].insert_many([
+            {"employee_id": emp, "full_name": f"Name {emp}", "email": f"{emp}@x.io",
+             "department": "IT", "created_at": datetime(2019, 1, 1)}
+            for emp in ("EMP001", "EMP002")
+        ])
+        await mock_db["attendance"].insert_many([
+            {"employee_id": emp, "date": date, "status": "Present",
+             "created_at": datetime(2020, 1, 1)}
+            for emp in ("EMP001", "EMP002")
+            for date in OLD_DATES + [HOT_DATE]
+        ])
+
+    asyncio.run(seed())
+    return mock_db
+
+
+def archive(before_date: str = "2021-01-01") -> dict:
+    return asyncio.run(ArchiveService.archive_attendance(before_date))
+
+
+def hot_count(db) -> int:
+    return asyncio.run(db["attendance"].count_documents({}))
+
+
+def test_archive_moves_old_records_and_is_idempotent(db, archive_dir):
+    summary = archive()
+    assert summary["archived"] == 6
+    assert summary["partitions"] == ["2020-01", "2020-02"]
+    assert hot_count(db) == 2
+    assert (archive_dir / "2020" / "2020-01" / "EMP001.ndjson.gz").exists()
+
+    manifest = json.loads((archive_dir / "manifest.json").read_text())
+    assert manifest["newest_date"] == "2020-02-03"
+
+    # Re-writing the same rows (e.g. after a crash before the delete) never duplicates
+    rows = [{"employee_id": "EMP001", "date": "2020-01-06", "status": "Absent"}]
+    archive_service._write_month("2020-01", rows)
+    archive_service._write_month("2020-01", rows)
+    assert asyncio.run(ArchiveService.count_archived()) == 6
+    archived = asyncio.run(ArchiveService.get_archived("EMP001", "2020-01-06", "2020-01-06"))
+    assert [r["status"] for r in archived] == ["Absent"]
+
+    assert archive()["archived"] == 0
+
+
+def test_record_changed_during_archive_stays_hot(db, monkeypatch):
+    loop_holder = {}
+    write_month = archive_service._write_month
+
+    def racing_write(month, records):
+        write_month(month, records)
+        if month == "2020-01":
+            # mark_attendance updates a row between the read and the delete
+            update = db["attendance"].update_one(
+                {"employee_id": "EMP001", "date": "2020-01-06"}, {"$set": {"status": "Leave"}}
+            )
+            asyncio.run_coroutine_threadsafe(update, loop_holder["loop"]).result()
+
+    monkeypatch.setattr(archive_service, "_write_month", racing_write)
+
+    async def run():
+        loop_holder["loop"] = asyncio.get_running_loop()
+        return await ArchiveService.archive_attendance("2021-01-01")
+
+    summary = asyncio.run(run())
+    assert summary["changed_during_archive"] == ["EMP001 2020-01-06"]
+    assert summary["archived"] == 5
+
+    records = asyncio.run(
+        AttendanceService.get_attendance_by_employee("EMP001", None, "2020-12-31")
+    )
+    assert {(r.date, r.status) for r in records} == {
+        ("2020-01-06", "Leave"), ("2020-01-13", "Present"), ("2020-02-03", "Present")
+    }
+    # Kept row lives only in the hot collection, so it is counted once
+    assert asyncio.run(ArchiveService.count_archived()) == 5
+    assert hot_count(db) == 3
+
+
+def test_range_reads_use_archive_from_either_bound(db):
+    archive()
+
+    end_only = asyncio.run(AttendanceService.get_attendance_by_employee("EMP001", None, "2020-12-31"))
+    assert [r.date for r in end_only] == ["2020-02-03", "2020-01-13", "2020-01-06"]
+
+    start_only = asyncio.run(AttendanceService.get_all_attendance("2020-01-10", None))
+    assert [r["date"] for r in start_only] == [HOT_DATE] * 2 + ["2020-02-03"] * 2 + ["2020-01-13"] * 2
+    assert {r["employee_name"] for r in start_only} == {"Name EMP001", "Name EMP002"}
+
+    # A range entirely after the archive horizon never plans any partitions
+    assert asyncio.run(ArchiveService.months(start_date="2021-01-01")) == []
+
+
+def test_unbounded_list_is_hot_only_but_export_includes_archive(db):
+    archive()
+
+    assert len(asyncio.run(AttendanceService.get_all_attendance())) == 2
+
+    async def export():
+        return [json.loads(line) async for line in AttendanceService.export_attendance()]
+
+    lines = asyncio.run(export())
+    assert len(lines) == 8
+    assert asyncio.run(AttendanceService.get_total_attendance()) == 8
+
+
+def test_remarking_archived_day_is_not_counted_twice(db):
+    archive()
+    asyncio.run(AttendanceService.mark_attendance(
+        AttendanceCreate(employee_id="EMP001", date="2020-01-06", status="Absent")
+    ))
+
+    assert asyncio.run(ArchiveService.count_archived()) == 5
+    assert asyncio.run(AttendanceService.get_total_attendance()) == 8
+    records = asyncio.run(AttendanceService.get_attendance_by_employee("EMP001", "2020-01-06", "2020-01-06"))
+    assert [r.status for r in records] == ["Absent"]
+
+
+def test_delete_employee_purges_archive(db, archive_dir):
+    archive()
+    asyncio.run(EmployeeService.delete_employee("EMP002"))
+
+    assert asyncio.run(ArchiveService.count_archived()) == 3
+    assert not (archive_dir / "2020" / "2020-01" / "EMP002.ndjson.gz").exists()
+
+
+def test_delete_employee_without_writable_archive(db, tmp_path, monkeypatch):
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    monkeypatch.setattr(archive_service, "ARCHIVE_DIR", blocker / "archive")
+
+    result = asyncio.run(EmployeeService.delete_employee("EMP001"))
+    assert "deleted" in result["message"]
+    assert not (blocker / "archive").exists()
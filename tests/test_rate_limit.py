@@ -0,0 +1,142 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+import app.middleware.rate_limit as rate_limit
+from app.middleware.rate_limit import (
+    ConcurrencyLimiter,
+    RateLimitMiddleware,
+    TokenBucket,
+    _client_id,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", fake)
+    return fake
+
+
+def build_app(slow: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware)
+
+    @app.get("/attendance/")
+    async def list_attendance():
+        await asyncio.sleep(slow)
+        return {}
+
+    @app.get("/attendance/{employee_id}")
+    async def employee_attendance(employee_id: str):
+        return {}
+
+    return app
+
+
+async def get_many(app: FastAPI, paths: list[str], headers: dict = None) -> list[httpx.Response]:
+    transport = httpx.ASGITransport(app=app, client=("10.0.0.1", 1234))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return [await client.get(path, headers=headers) for path in paths]
+
+
+def test_token_bucket_burst_then_refill(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    assert [bucket.consume() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.consume() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert bucket.consume() == 0.0
+    assert bucket.consume() > 0
+
+    # Refill never exceeds capacity
+    clock.now += 60
+    assert [bucket.consume() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.consume() > 0
+
+
+def test_limiter_queues_then_sheds():
+    async def scenario():
+        limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=1, queue_timeout=0.05)
+        assert await limiter.acquire()
+
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+
+        # Queue full: shed immediately
+        assert not await limiter.acquire()
+
+        limiter.release()
+        assert await queued
+        assert limiter.in_flight == 1
+
+        # Nobody releases: the queued request times out and is shed
+        assert not await limiter.acquire()
+        assert limiter.queued == 0
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize(
+    "hops, header, expected",
+    [
+        (0, b"1.1.1.1", "10.0.0.1"),
+        (1, b"6.6.6.6, 1.1.1.1", "1.1.1.1"),
+        (2, b"6.6.6.6, 1.1.1.1, 2.2.2.2", "1.1.1.1"),
+        (2, b"1.1.1.1", "10.0.0.1"),
+    ],
+)
+def test_client_id_trusts_only_configured_hops(monkeypatch, hops, header, expected):
+    monkeypatch.setattr(rate_limit, "TRUSTED_PROXY_HOPS", hops)
+    scope = {"headers": [(b"x-forwarded-for", header)], "client": ("10.0.0.1", 1234)}
+    assert _client_id(scope) == expected
+
+
+def test_spoofed_forwarded_for_shares_one_bucket():
+    app = build_app()
+    responses = asyncio.run(get_many(
+        app, ["/attendance/"] * 10, headers={"X-Forwarded-For": "9.9.9.9"}
+    ))
+    statuses = [r.status_code for r in responses]
+    assert statuses.count(200) == rate_limit.EXPENSIVE_RATE_LIMIT_BURST
+    shed = responses[-1]
+    assert shed.status_code == 429
+    assert int(shed.headers["Retry-After"]) >= 1
+
+
+def test_path_params_and_unmatched_paths_share_keys():
+    app = build_app()
+    paths = [f"/attendance/EMP{i:03d}" for i in range(8)] + [f"/nope/{i}" for i in range(25)]
+    responses = asyncio.run(get_many(app, paths))
+
+    shed = rate_limit.stats.snapshot()["shed_rate_limited"]
+    assert shed == {
+        "GET /attendance/{employee_id}": 8 - rate_limit.EXPENSIVE_RATE_LIMIT_BURST,
+        "GET <unmatched>": 25 - rate_limit.RATE_LIMIT_BURST,
+    }
+    assert responses[-1].status_code == 429
+
+
+def test_saturated_route_sheds_with_503(monkeypatch):
+    monkeypatch.setattr(rate_limit, "EXPENSIVE_RATE_LIMIT_BURST", 100)
+    monkeypatch.setattr(rate_limit, "EXPENSIVE_MAX_IN_FLIGHT", 2)
+    monkeypatch.setattr(rate_limit, "EXPENSIVE_MAX_QUEUE", 1)
+    app = build_app(slow=0.2)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[client.get("/attendance/") for _ in range(6)])
+
+    statuses = sorted(r.status_code for r in asyncio.run(scenario()))
+    assert statuses == [200, 200, 200, 503, 503, 503]
+    assert rate_limit.stats.snapshot()["shed_overloaded"] == {"GET /attendance/": 3}